@@ -3,15 +3,18 @@ Audio Player GUI for comparing original, vocal, and instrumental tracks
 Apple-inspired design with seekable progress bar and pitch shifting
 """
 
+import concurrent.futures
+import functools
+import math
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, Canvas
 import pygame
-import pyaudio
-import wave
 import os
+import queue
+import struct
 import sys
 import threading
-import time
 import numpy as np
 import librosa
 import soundfile as sf
@@ -19,10 +22,278 @@ from mutagen import File as MutagenFile
 from repet import REPET
 from pitch_shift import PitchShifter
 
+try:
+    from PIL import Image, ImageDraw, ImageTk
+except ImportError:  # Pillow is optional; buttons fall back to canvas polygons
+    Image = None
+
+
+# Mixer output settings. A 1024-sample buffer (~23 ms at 44.1 kHz) keeps
+# play/seek latency low without risking underruns; raise it if playback
+# crackles on slower machines.
+MIXER_FREQUENCY = 44100
+MIXER_SIZE = -16
+MIXER_CHANNELS = 2
+MIXER_BUFFER = 1024
+
+# Playback progress refresh interval
+PROGRESS_INTERVAL_MS = 200
+
+# How often UI callbacks queued by background workers are run
+UI_POLL_MS = 50
+
+# Minimum interval between progress-bar updates while dragging (~60 Hz)
+DRAG_INTERVAL_MS = 16
+
+# One worker process per pitch-shifting method
+PITCH_WORKERS = 3
+
+# REPET analysis window length; n_fft is the nearest power of two
+REPET_WINDOW_MS = 90
+REPET_DEFAULT_N_FFT = 2048
+
+
+@functools.lru_cache(maxsize=64)
+def _rounded_points(x1, y1, x2, y2, radius):
+    """
+    Flat polygon point tuple for a smoothed rounded rectangle.
+
+    Tk's smoothing already passes through the midpoint of each edge, so
+    listing each point once traces the same curve as doubling the points
+    at radius; the corners bend over roughly radius / 2.
+    """
+    return (x1+radius, y1,
+            x2-radius, y1,
+            x2, y1,
+            x2, y1+radius,
+            x2, y2-radius,
+            x2, y2,
+            x2-radius, y2,
+            x1+radius, y2,
+            x1, y2,
+            x1, y2-radius,
+            x1, y1+radius,
+            x1, y1)
+
+
+def _wav_duration(filepath):
+    """
+    Duration of a RIFF/WAVE file from its chunk headers, without decoding.
+
+    Returns None if the header cannot be parsed (e.g. RF64).
+    """
+    with open(filepath, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            return None
+
+        byte_rate = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size + (chunk_size & 1))
+                byte_rate = struct.unpack('<I', fmt[8:12])[0]
+            elif chunk_id == b'data':
+                if not byte_rate or chunk_size == 0xFFFFFFFF:
+                    return None
+                return chunk_size / byte_rate
+            else:
+                # Chunks are word-aligned
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _probe_audio_length(filepath):
+    """
+    Length of an audio file in seconds.
+
+    WAV durations come straight from the RIFF header; other containers go
+    through Mutagen.
+    """
+    if filepath.lower().endswith('.wav'):
+        try:
+            duration = _wav_duration(filepath)
+            if duration is not None:
+                return duration
+        except (OSError, struct.error):
+            pass
+
+    try:
+        audio = MutagenFile(filepath)
+        if audio is not None and hasattr(audio.info, 'length'):
+            return audio.info.length
+    except:
+        pass
+
+    return 0
+
+
+def _render_rounded_rect(width, height, radius, color, scale=4):
+    """
+    Render an anti-aliased rounded rectangle with Pillow.
+
+    The shape is drawn at `scale` times the size and downsampled so the
+    corners stay smooth. The 2 px inset and the radius / 2 corner match
+    what the smoothed canvas polygon from _rounded_points draws.
+    """
+    radius = min(radius / 2, (width - 4) / 2, (height - 4) / 2)
+    image = Image.new("RGBA", (width * scale, height * scale), (0, 0, 0, 0))
+    ImageDraw.Draw(image).rounded_rectangle(
+        (2 * scale, 2 * scale, (width - 2) * scale - 1, (height - 2) * scale - 1),
+        radius=radius * scale, fill=color)
+    return image.resize((width, height), Image.BOX)
+
+
+def _repet_n_fft(filepath):
+    """
+    Pick a REPET FFT size that keeps the analysis window near REPET_WINDOW_MS.
+
+    Args:
+        filepath: Audio file to be separated
+
+    Returns:
+        n_fft: Power-of-two FFT size (REPET_DEFAULT_N_FFT if the header can't be read)
+    """
+    try:
+        sr = sf.info(filepath).samplerate
+    except RuntimeError:
+        return REPET_DEFAULT_N_FFT
+    return 1 << int(round(math.log2(sr * REPET_WINDOW_MS / 1000)))
+
+
+def _source_pitch_worker(sr, input_path):
+    """
+    Detect the average pitch of a file in a worker process.
+
+    Args:
+        sr: Sample rate for the PitchShifter
+        input_path: Audio file to analyse
+
+    Returns:
+        Average pitch in Hz
+    """
+    shifter = PitchShifter(sr=sr)
+    audio, _ = shifter.load_audio(input_path)
+    return shifter.detect_pitch_from_audio(audio)
+
+
+def _pitch_shift_worker(sr, method, input_path, output_path, params):
+    """
+    Run one pitch-shift job in a worker process.
+
+    Args:
+        sr: Sample rate for the PitchShifter
+        method: 'td_psola', 'phase_vocoder', or 'wsola'
+        input_path: Vocal track to shift
+        output_path: Where to write the shifted track
+        params: Keyword arguments for process_file (semitones or target_pitch_hz)
+    """
+    shifter = PitchShifter(sr=sr)
+    if method == 'phase_vocoder':
+        # Single-buffer vocoder avoids librosa's intermediate copies
+        shifter.process_file_inplace(input_path, output_path, **params)
+    else:
+        shifter.process_file(input_path, output_path, method=method, **params)
+
+
+class _DaemonExecutor:
+    """
+    Run submitted jobs one at a time on a daemon thread.
+
+    ThreadPoolExecutor workers are joined at interpreter exit, so closing the
+    window would wait for an in-flight separation; a daemon worker is simply
+    dropped with the process.
+    """
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, fn, *args):
+        """Queue fn(*args) and return a Future for its result."""
+        future = concurrent.futures.Future()
+        self._jobs.put((future, fn, args))
+        return future
+
+    def shutdown(self):
+        """Cancel queued jobs; the running one is abandoned."""
+        try:
+            while True:
+                job = self._jobs.get_nowait()
+                if job is not None:
+                    job[0].cancel()
+        except queue.Empty:
+            pass
+        self._jobs.put(None)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, fn, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+
+class _ProcessWorkers:
+    """
+    Run submitted jobs on a pool of spawned worker processes.
+
+    Holds the multiprocessing pool itself so closing the window can
+    terminate in-flight jobs instead of waiting for them; results come back
+    as concurrent.futures Futures like the thread workers.
+    """
+
+    def __init__(self, processes):
+        self._pool = multiprocessing.get_context("spawn").Pool(processes)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        """Queue fn(*args) on a worker process and return a Future for its result."""
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._pending.add(future)
+        self._pool.apply_async(fn, args,
+                               callback=lambda result: self._finish(future, result, None),
+                               error_callback=lambda exc: self._finish(future, None, exc))
+        return future
+
+    def terminate(self):
+        """Kill the worker processes and cancel every unfinished job."""
+        self._pool.terminate()
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        for future in pending:
+            future.cancel()
+
+    def _finish(self, future, result, error):
+        with self._lock:
+            self._pending.discard(future)
+        if not future.set_running_or_notify_cancel():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
 
 class RoundedButton(Canvas):
     """Custom rounded button widget inspired by Apple design."""
 
+    # Pre-rendered button shapes shared by all buttons, keyed by
+    # (width, height, radius, color)
+    _shape_images = {}
+
     def __init__(self, parent, text, command, bg_color="#007AFF", fg_color="white",
                  width=120, height=40, corner_radius=10, **kwargs):
         Canvas.__init__(self, parent, width=width, height=height,
@@ -36,62 +307,74 @@ class RoundedButton(Canvas):
         self.height = height
         self.is_disabled = False
 
+        # Canvas items, created on first draw and reconfigured afterwards
+        self._shape_id = None
+        self._text_id = None
+        self._geometry = None
+
         self.draw()
         self.bind("<Button-1>", self.on_click)
         self.bind("<Enter>", self.on_enter)
         self.bind("<Leave>", self.on_leave)
 
+    @property
+    def bg_color(self):
+        return self._bg_hex
+
+    @bg_color.setter
+    def bg_color(self, color):
+        # Precompute the hover shade whenever the background changes
+        self._bg_hex = color
+        self._hover_hex = self.lighten_color(color)
+
     def draw(self, hover=False):
-        self.delete("all")
-        color = self.lighten_color(self.bg_color) if hover and not self.is_disabled else self.bg_color
+        color = self._hover_hex if hover and not self.is_disabled else self._bg_hex
         if self.is_disabled:
             color = "#D1D1D6"
             fg = "#999999"
         else:
             fg = self.fg_color
 
-        # Draw rounded rectangle
-        self.create_rounded_rect(2, 2, self.width-2, self.height-2,
-                                self.corner_radius, fill=color, outline="")
+        geometry = (self.width, self.height, self.corner_radius)
+        if geometry != self._geometry:
+            self.delete("all")
+            self._geometry = geometry
 
-        # Draw text
-        self.create_text(self.width/2, self.height/2, text=self.text,
-                        fill=fg, font=("SF Pro Text", 13, "bold"))
+            # Draw rounded rectangle
+            if Image is not None:
+                self._shape_id = self.create_image(0, 0, anchor=tk.NW,
+                                                   image=self.shape_image(color))
+            else:
+                self._shape_id = self.create_rounded_rect(2, 2, self.width-2, self.height-2,
+                                                          self.corner_radius, fill=color, outline="")
+
+            # Draw text
+            self._text_id = self.create_text(self.width/2, self.height/2, text=self.text,
+                                             fill=fg, font=("SF Pro Text", 13, "bold"))
+        elif Image is not None:
+            self.itemconfig(self._shape_id, image=self.shape_image(color))
+            self.itemconfig(self._text_id, fill=fg, text=self.text)
+        else:
+            self.itemconfig(self._shape_id, fill=color)
+            self.itemconfig(self._text_id, fill=fg, text=self.text)
+
+    def shape_image(self, color):
+        """Return the cached PhotoImage of this button's shape in a given color."""
+        key = (self.width, self.height, self.corner_radius, color)
+        image = self._shape_images.get(key)
+        if image is None:
+            image = ImageTk.PhotoImage(_render_rounded_rect(*key), master=self)
+            self._shape_images[key] = image
+        return image
 
     def create_rounded_rect(self, x1, y1, x2, y2, radius, **kwargs):
-        points = [x1+radius, y1,
-                 x1+radius, y1,
-                 x2-radius, y1,
-                 x2-radius, y1,
-                 x2, y1,
-                 x2, y1+radius,
-                 x2, y1+radius,
-                 x2, y2-radius,
-                 x2, y2-radius,
-                 x2, y2,
-                 x2-radius, y2,
-                 x2-radius, y2,
-                 x1+radius, y2,
-                 x1+radius, y2,
-                 x1, y2,
-                 x1, y2-radius,
-                 x1, y2-radius,
-                 x1, y1+radius,
-                 x1, y1+radius,
-                 x1, y1]
-        return self.create_polygon(points, smooth=True, **kwargs)
+        points = _rounded_points(x1, y1, x2, y2, radius)
+        return self.create_polygon(points, smooth=True, splinesteps=12, **kwargs)
 
     def lighten_color(self, color):
-        # Simple color lightening for hover effect
-        color_map = {
-            "#007AFF": "#3395FF",
-            "#34C759": "#5DD779",
-            "#FF3B30": "#FF5B50",
-            "#FF9500": "#FFB040",
-            "#AF52DE": "#BF72EE",
-            "#FF2D55": "#FF5775",
-        }
-        return color_map.get(color, color)
+        # Lighten each RGB channel by a fixed step for the hover effect
+        rgb = (int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16))
+        return "#%02X%02X%02X" % tuple(min(255, c + 40) for c in rgb)
 
     def on_click(self, event):
         if not self.is_disabled and self.command:
@@ -143,8 +426,14 @@ class AudioPlayer:
 
         self.root.configure(bg=self.bg_color)
 
-        # Initialize pygame mixer
+        # Initialize pygame mixer with explicit low-latency settings
+        pygame.mixer.pre_init(frequency=MIXER_FREQUENCY,
+                              size=MIXER_SIZE,
+                              channels=MIXER_CHANNELS,
+                              buffer=MIXER_BUFFER)
         pygame.mixer.init()
+        # Only one track plays at a time
+        pygame.mixer.set_num_channels(1)
 
         # Audio file paths
         self.original_file = None
@@ -164,16 +453,102 @@ class AudioPlayer:
         self.audio_length = 0
         self.update_progress_job = None
         self.seeking = False
-        self.start_time = 0
+        # Audio lengths keyed by (path, mtime_ns, size)
+        self._length_cache = {}
+        # Track position (seconds) the current play() call started from;
+        # the mixer reports elapsed time relative to it
+        self.play_offset = 0
+        self._cur_ms = 0
+        self._last_sec = 0
+
+        # Progress bar canvas items (created with the playback card) and the
+        # last geometry pushed to them
+        self._track_id = None
+        self._fill_id = None
+        self._last_track_width = -1
+        self._last_fill_px = -1
+        self._redraw_pending = False
+
+        # Latest drag position, applied at most once per DRAG_INTERVAL_MS
+        self._drag_x = 0
+        self._drag_job = None
 
         # Pitch shifting
         self.pitch_shifter = PitchShifter(sr=22050)
         self.is_recording = False
         self.recorded_pitch = None
 
+        # Background workers: one thread for separation, one for microphone
+        # capture, and a process pool so the pitch-shifting methods run on
+        # separate cores. The pool spawns rather than forks: this process
+        # runs numba's parallel TD-PSOLA kernel during warm-up, and a forked
+        # copy of its threading layer hangs (TBB) or aborts (OpenMP)
+        # Separation and probing run on daemon workers so closing the window
+        # never waits for them (see _on_close for the pitch processes)
+        self._dsp_pool = _DaemonExecutor()
+        self._record_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._pitch_pool = _ProcessWorkers(PITCH_WORKERS)
+        self._probe_pool = _DaemonExecutor()
+
+        # REPET instances (and their windows) by (n_fft, hop_length), only
+        # touched from the DSP worker
+        self._repets = {}
+
+        # Source-pitch detection futures by vocal file key, shared by every
+        # method shifting that file to a recorded target pitch
+        self._source_pitch = {}
+
+        # UI callbacks posted by background workers, run on the Tk thread
+        self._ui_q = queue.Queue()
+
+        # Capture buffers, reused across recordings
+        self._record_buf = None
+        self._record_audio = None
+
+        # PortAudio session and input stream, opened on first recording and
+        # kept for the lifetime of the window
+        self._pa = None
+        self._input_stream = None
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
         # Create UI
         self.create_widgets()
 
+        # Pay librosa/numba first-call costs while the user picks a file
+        self._dsp_pool.submit(self._warm_up)
+
+        self._drain_ui()
+
+    def _post_ui(self, callback, *args):
+        """Queue a callback to run on the Tk thread (safe from any thread)."""
+        self._ui_q.put(functools.partial(callback, *args))
+
+    def _drain_ui(self):
+        """Run all queued UI callbacks in one pass, then reschedule."""
+        try:
+            while True:
+                self._ui_q.get_nowait()()
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(UI_POLL_MS, self._drain_ui)
+
+    def _warm_up(self):
+        """Run tiny STFT, pitch tracking and REPET passes to warm caches and JIT."""
+        sr = 22050
+        librosa.stft(np.zeros(2048, dtype=np.float32))
+        librosa.yin(np.zeros(4096, dtype=np.float32), fmin=50, fmax=500, sr=sr)
+        self.pitch_shifter.detect_pitch_from_audio(np.zeros(4096, dtype=np.float32))
+
+        # Compiles (and caches on disk for the pitch worker processes) the
+        # TD-PSOLA kernels
+        self.pitch_shifter.td_psola(np.zeros(sr, dtype=np.float32), 1.5)
+
+        repet = self._get_repet(2048, 512)
+        magnitude = np.abs(repet.compute_stft(np.zeros(sr, dtype=np.float32)))
+        period = repet.find_repeating_period(magnitude, sr)
+        repet.compute_repeating_mask(magnitude, period)
+
     def create_card(self, parent, pady=10):
         """Create an Apple-style card container."""
         frame = tk.Frame(parent, bg=self.card_bg, relief=tk.FLAT)
@@ -244,32 +619,10 @@ class AudioPlayer:
             elif event.keysym == 'Next':  # Page Down
                 canvas.yview_scroll(10, "units")
 
-        def _bind_to_mousewheel(event):
-            if sys.platform == 'linux':
-                canvas.bind_all("<Button-4>", _on_mousewheel_linux)
-                canvas.bind_all("<Button-5>", _on_mousewheel_linux)
-            else:
-                canvas.bind_all("<MouseWheel>", _on_mousewheel)
-            # Bind arrow keys
-            canvas.bind_all("<Up>", _on_arrow_key)
-            canvas.bind_all("<Down>", _on_arrow_key)
-            canvas.bind_all("<Prior>", _on_arrow_key)
-            canvas.bind_all("<Next>", _on_arrow_key)
-
-        def _unbind_from_mousewheel(event):
-            if sys.platform == 'linux':
-                canvas.unbind_all("<Button-4>")
-                canvas.unbind_all("<Button-5>")
-            else:
-                canvas.unbind_all("<MouseWheel>")
-            # Unbind arrow keys
-            canvas.unbind_all("<Up>")
-            canvas.unbind_all("<Down>")
-            canvas.unbind_all("<Prior>")
-            canvas.unbind_all("<Next>")
-
-        canvas.bind('<Enter>', _bind_to_mousewheel)
-        canvas.bind('<Leave>', _unbind_from_mousewheel)
+        # Arrow keys go to the focused widget, so grab focus on entry
+        canvas.bind('<Enter>', lambda event: canvas.focus_set())
+        for key in ("<Up>", "<Down>", "<Prior>", "<Next>"):
+            canvas.bind(key, _on_arrow_key)
 
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -292,6 +645,22 @@ class AudioPlayer:
         # Playback card
         self.create_playback_card(scrollable_frame)
 
+        # Wheel events are delivered to the widget under the pointer, so tag
+        # the canvas and every card widget with a shared bindtag instead of
+        # installing global handlers with bind_all
+        scroll_tag = "ScrollRegion"
+        if sys.platform == 'linux':
+            canvas.bind_class(scroll_tag, "<Button-4>", _on_mousewheel_linux)
+            canvas.bind_class(scroll_tag, "<Button-5>", _on_mousewheel_linux)
+        else:
+            canvas.bind_class(scroll_tag, "<MouseWheel>", _on_mousewheel)
+
+        pending = [canvas]
+        while pending:
+            widget = pending.pop()
+            widget.bindtags((scroll_tag,) + widget.bindtags())
+            pending.extend(widget.winfo_children())
+
         # Status bar
         self.status_label = tk.Label(self.root,
                                      text="Ready",
@@ -463,6 +832,12 @@ class AudioPlayer:
         self.apply_wsola_btn.config_state("disabled")
         self.apply_wsola_btn.pack(pady=3)
 
+        self.apply_buttons = {
+            'td_psola': self.apply_tdpsola_btn,
+            'phase_vocoder': self.apply_phasevocoder_btn,
+            'wsola': self.apply_wsola_btn,
+        }
+
         self.pitch_status_label = tk.Label(inner,
                                           text="",
                                           font=("SF Pro Text", 12),
@@ -591,6 +966,12 @@ class AudioPlayer:
                                       highlightthickness=0)
         self.progress_canvas.pack(fill=tk.X)
 
+        # Background track and fill, moved with coords() on every redraw
+        self._track_id = self.progress_canvas.create_rectangle(
+            0, 0, 0, 6, fill="#E5E5EA", outline="")
+        self._fill_id = self.progress_canvas.create_rectangle(
+            -10, 0, -10, 6, fill=self.accent_blue, outline="")
+
         self.progress_var = tk.DoubleVar(value=0)
         self.draw_progress_bar()
 
@@ -673,10 +1054,10 @@ class AudioPlayer:
         self.record_btn.draw()
         self.pitch_status_label.config(text="🎤 Recording... Say 'Ahhhh'", fg=self.accent_red)
 
-        # Run recording in thread
-        thread = threading.Thread(target=self._record_thread)
-        thread.daemon = True
-        thread.start()
+        # Run recording in background
+        future = self._record_pool.submit(self._record_thread)
+        future.add_done_callback(
+            lambda f: self._post_ui(self._on_record_done, f))
 
     def stop_recording(self):
         """Stop recording audio."""
@@ -686,63 +1067,99 @@ class AudioPlayer:
         self.record_btn.draw()
 
     def _record_thread(self):
-        """Background thread for audio recording."""
+        """Background worker for audio recording. Returns the detected pitch."""
+        # Imported here so PortAudio only initializes if the user records
+        import pyaudio
+
         CHUNK = 1024
         FORMAT = pyaudio.paInt16
         CHANNELS = 1
         RATE = 22050
         RECORD_SECONDS = 3
 
-        p = pyaudio.PyAudio()
+        stream = None
 
         try:
-            stream = p.open(format=FORMAT,
-                          channels=CHANNELS,
-                          rate=RATE,
-                          input=True,
-                          frames_per_buffer=CHUNK)
-
-            frames = []
-
-            for i in range(0, int(RATE / CHUNK * RECORD_SECONDS)):
+            if self._pa is None:
+                self._pa = pyaudio.PyAudio()
+            if self._input_stream is None:
+                self._input_stream = self._pa.open(format=FORMAT,
+                                                   channels=CHANNELS,
+                                                   rate=RATE,
+                                                   input=True,
+                                                   frames_per_buffer=CHUNK,
+                                                   start=False)
+            stream = self._input_stream
+            stream.start_stream()
+
+            # Capture straight into a preallocated int16 buffer
+            n_chunks = int(RATE / CHUNK * RECORD_SECONDS)
+            if self._record_buf is None or len(self._record_buf) != n_chunks * CHUNK:
+                self._record_buf = np.empty(n_chunks * CHUNK, dtype=np.int16)
+                self._record_audio = np.empty(n_chunks * CHUNK, dtype=np.float32)
+            buf = self._record_buf
+            n_samples = 0
+
+            for i in range(n_chunks):
                 if not self.is_recording:
                     break
-                data = stream.read(CHUNK)
-                frames.append(data)
+                data = stream.read(CHUNK, exception_on_overflow=False)
+                buf[i * CHUNK:(i + 1) * CHUNK] = np.frombuffer(data, dtype=np.int16)
+                n_samples = (i + 1) * CHUNK
 
             stream.stop_stream()
-            stream.close()
-
-            # Save recording
-            temp_file = "temp_recording.wav"
-            wf = wave.open(temp_file, 'wb')
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(p.get_sample_size(FORMAT))
-            wf.setframerate(RATE)
-            wf.writeframes(b''.join(frames))
-            wf.close()
-
-            # Detect pitch
-            audio, sr = librosa.load(temp_file, sr=22050)
-            self.recorded_pitch = self.pitch_shifter.detect_pitch_from_audio(audio)
-
-            # Clean up
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-
-            # Update UI
-            self.root.after(0, lambda: self.pitch_status_label.config(
-                text=f"Detected pitch: {self.recorded_pitch:.1f} Hz",
-                fg=self.accent_green))
 
-        except Exception as e:
-            self.root.after(0, lambda: self.pitch_status_label.config(
-                text=f"Recording error: {str(e)}",
-                fg=self.accent_red))
+            # Convert once to float32 and detect pitch without touching disk
+            audio = self._record_audio[:n_samples]
+            np.multiply(buf[:n_samples], 1.0 / 32768.0, out=audio)
+            return self.pitch_shifter.detect_pitch_from_audio(audio)
+
         finally:
-            p.terminate()
+            if stream is not None and stream.is_active():
+                stream.stop_stream()
             self.is_recording = False
-            self.root.after(0, lambda: self.record_btn.config_state("normal"))
+
+    def _close_audio_input(self):
+        """Close the persistent input stream and PortAudio session."""
+        if self._input_stream is not None:
+            self._input_stream.close()
+            self._input_stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+    def _on_close(self):
+        """Release audio resources and close the window."""
+        self.is_recording = False
+        self._dsp_pool.shutdown()
+        self._probe_pool.shutdown()
+
+        # In-flight pitch shifts are terminated rather than left to finish
+        self._pitch_pool.terminate()
+
+        # PortAudio is torn down on the recording worker that owns it
+        self._record_pool.submit(self._close_audio_input)
+        self._record_pool.shutdown(wait=True)
+
+        pygame.mixer.quit()
+        self.root.destroy()
+
+    def _on_record_done(self, future):
+        """Called on the Tk thread when a recording job finishes."""
+        self.record_btn.config_state("normal")
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            self.pitch_status_label.config(text=f"Recording error: {str(error)}",
+                                           fg=self.accent_red)
+            return
+
+        self.recorded_pitch = future.result()
+        self.pitch_status_label.config(
+            text=f"Detected pitch: {self.recorded_pitch:.1f} Hz",
+            fg=self.accent_green)
 
     def apply_pitch_shift(self, method):
         """Apply pitch shift to vocal track with specified method."""
@@ -750,10 +1167,8 @@ class AudioPlayer:
             messagebox.showerror("Error", "Please separate audio first to get vocal track")
             return
 
-        # Disable all buttons
-        self.apply_tdpsola_btn.config_state("disabled")
-        self.apply_phasevocoder_btn.config_state("disabled")
-        self.apply_wsola_btn.config_state("disabled")
+        # Only this method's button is disabled; the others may run alongside
+        self.apply_buttons[method].config_state("disabled")
 
         method_names = {
             'td_psola': 'TD-PSOLA',
@@ -762,63 +1177,87 @@ class AudioPlayer:
         }
         self.pitch_status_label.config(text=f"Processing with {method_names[method]}...", fg=self.accent_orange)
 
-        # Run in thread
-        thread = threading.Thread(target=self._pitch_shift_thread, args=(method,))
-        thread.daemon = True
-        thread.start()
+        base_name = os.path.splitext(self.vocal_file)[0]
 
-    def _pitch_shift_thread(self, method):
-        """Background thread for pitch shifting."""
-        try:
-            base_name = os.path.splitext(self.vocal_file)[0]
-
-            # Set output file based on method
-            if method == 'td_psola':
-                output_file = f"{base_name}_tdpsola.wav"
-                self.vocal_shifted_tdpsola = output_file
-            elif method == 'phase_vocoder':
-                output_file = f"{base_name}_phasevocoder.wav"
-                self.vocal_shifted_phasevocoder = output_file
-            elif method == 'wsola':
-                output_file = f"{base_name}_wsola.wav"
-                self.vocal_shifted_wsola = output_file
-
-            # Get pitch shift parameters
-            if self.recorded_pitch is not None:
-                # Use recorded pitch as target
-                self.pitch_shifter.process_file(
-                    self.vocal_file,
-                    output_file,
-                    target_pitch_hz=self.recorded_pitch,
-                    method=method
-                )
-                message = f"Pitched to {self.recorded_pitch:.1f} Hz using {method}"
-            else:
-                # Use slider value
-                semitones = int(self.pitch_slider.get())
-                self.pitch_shifter.process_file(
-                    self.vocal_file,
-                    output_file,
-                    semitones=semitones,
-                    method=method
-                )
-                message = f"Shifted by {semitones:+d} semitones using {method}"
-
-            # Update UI
-            self.root.after(0, lambda: self._pitch_shift_complete(message, method))
+        # Set output file based on method
+        if method == 'td_psola':
+            output_file = f"{base_name}_tdpsola.wav"
+            self.vocal_shifted_tdpsola = output_file
+        elif method == 'phase_vocoder':
+            output_file = f"{base_name}_phasevocoder.wav"
+            self.vocal_shifted_phasevocoder = output_file
+        elif method == 'wsola':
+            output_file = f"{base_name}_wsola.wav"
+            self.vocal_shifted_wsola = output_file
+
+        # Get pitch shift parameters
+        if self.recorded_pitch is not None:
+            # Use recorded pitch as target; the vocal's own pitch is detected
+            # once and shared by all methods
+            target = self.recorded_pitch
+            message = f"Pitched to {target:.1f} Hz using {method}"
+            source = self._source_pitch_future(self.vocal_file)
+            source.add_done_callback(
+                lambda f: self._post_ui(self._on_source_pitch, f, method,
+                                        output_file, target, message))
+        else:
+            # Use slider value
+            semitones = int(self.pitch_slider.get())
+            message = f"Shifted by {semitones:+d} semitones using {method}"
+            self._submit_pitch_shift(method, output_file, {'semitones': semitones}, message)
+
+    def _source_pitch_future(self, filepath):
+        """Return the (possibly finished) pitch-detection job for a file."""
+        key = self._file_key(filepath)
+        future = self._source_pitch.get(key)
+        if future is None:
+            future = self._pitch_pool.submit(_source_pitch_worker,
+                                             self.pitch_shifter.sr, filepath)
+            self._source_pitch[key] = future
+        return future
+
+    def _on_source_pitch(self, future, method, output_file, target, message):
+        """Called on the Tk thread once the vocal's pitch is known."""
+        if future.cancelled():
+            return
 
-        except Exception as e:
-            error_msg = f"Pitch shift error: {str(e)}"
-            self.root.after(0, lambda: self._pitch_shift_error(error_msg))
+        error = future.exception()
+        if error is not None:
+            # Forget the failed job so the next attempt retries
+            for key in [k for k, f in self._source_pitch.items() if f is future]:
+                del self._source_pitch[key]
+            self._pitch_shift_error(f"Pitch detection error: {str(error)}", method)
+            return
+
+        params = {'pitch_shift_factor': target / future.result()}
+        self._submit_pitch_shift(method, output_file, params, message)
+
+    def _submit_pitch_shift(self, method, output_file, params, message):
+        """Run one pitch-shift method on the vocal track in a worker process."""
+        future = self._pitch_pool.submit(_pitch_shift_worker, self.pitch_shifter.sr,
+                                         method, self.vocal_file, output_file, params)
+        future.add_done_callback(
+            lambda f: self._post_ui(self._on_pitch_shift_done, f, method, message))
+
+    def _on_pitch_shift_done(self, future, method, message):
+        """Called on the Tk thread when a pitch shift job finishes."""
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            self._pitch_shift_error(f"Pitch shift error: {str(error)}", method)
+        else:
+            self._pitch_shift_complete(message, method)
 
     def _pitch_shift_complete(self, message, method):
         """Called when pitch shift is complete."""
         self.pitch_status_label.config(text=f"✓ {message}", fg=self.accent_green)
+        self.invalidate_audio_length(self.vocal_shifted_tdpsola,
+                                     self.vocal_shifted_phasevocoder,
+                                     self.vocal_shifted_wsola)
 
-        # Re-enable all buttons
-        self.apply_tdpsola_btn.config_state("normal")
-        self.apply_phasevocoder_btn.config_state("normal")
-        self.apply_wsola_btn.config_state("normal")
+        self.apply_buttons[method].config_state("normal")
 
         # Enable corresponding play button
         if method == 'td_psola':
@@ -830,33 +1269,46 @@ class AudioPlayer:
 
         messagebox.showinfo("Success", f"Pitch shifting complete!\n\n{message}")
 
-    def _pitch_shift_error(self, error_msg):
+    def _pitch_shift_error(self, error_msg, method):
         """Called when pitch shift encounters an error."""
         self.pitch_status_label.config(text="Pitch shift failed", fg=self.accent_red)
-        self.apply_tdpsola_btn.config_state("normal")
-        self.apply_phasevocoder_btn.config_state("normal")
-        self.apply_wsola_btn.config_state("normal")
+        self.apply_buttons[method].config_state("normal")
         messagebox.showerror("Error", error_msg)
 
     def draw_progress_bar(self):
         """Draw custom rounded progress bar."""
-        self.progress_canvas.delete("all")
         width = self.progress_canvas.winfo_width()
         if width <= 1:
             width = 600
 
         # Background track
-        self.progress_canvas.create_rectangle(0, 0, width, 6,
-                                             fill="#E5E5EA",
-                                             outline="")
+        if width != self._last_track_width:
+            self._last_track_width = width
+            self.progress_canvas.coords(self._track_id, 0, 0, width, 6)
 
         # Progress fill
         progress = self.progress_var.get()
-        fill_width = (progress / 100) * width
-        if fill_width > 0:
-            self.progress_canvas.create_rectangle(0, 0, fill_width, 6,
-                                                 fill=self.accent_blue,
-                                                 outline="")
+        self._update_progress_fill(int((progress / 100) * width))
+
+    def _update_progress_fill(self, fill_px):
+        """Move the fill rectangle, skipping sub-pixel progress changes."""
+        if fill_px != self._last_fill_px:
+            self._last_fill_px = fill_px
+            if fill_px > 0:
+                self.progress_canvas.coords(self._fill_id, 0, 0, fill_px, 6)
+            else:
+                # Park an empty fill off-canvas rather than deleting it
+                self.progress_canvas.coords(self._fill_id, -10, 0, -10, 6)
+
+    def request_progress_redraw(self):
+        """Coalesce progress-bar repaints into a single idle callback."""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.root.after_idle(self._idle_redraw_progress)
+
+    def _idle_redraw_progress(self):
+        self._redraw_pending = False
+        self.draw_progress_bar()
 
     def on_progress_click(self, event):
         """Handle progress bar click."""
@@ -866,10 +1318,23 @@ class AudioPlayer:
     def on_progress_drag(self, event):
         """Handle progress bar drag."""
         if self.seeking:
-            self.update_progress_from_mouse(event.x)
+            # Motion events can arrive far faster than the screen refreshes;
+            # keep only the latest position and apply it on a timer
+            self._drag_x = event.x
+            if self._drag_job is None:
+                self._drag_job = self.root.after(DRAG_INTERVAL_MS, self._flush_drag)
+
+    def _flush_drag(self):
+        self._drag_job = None
+        if self.seeking:
+            self.update_progress_from_mouse(self._drag_x)
 
     def on_progress_release(self, event):
         """Handle progress bar release."""
+        if self._drag_job is not None:
+            self.root.after_cancel(self._drag_job)
+            self._drag_job = None
+
         if self.seeking:
             self.update_progress_from_mouse(event.x)
 
@@ -879,14 +1344,20 @@ class AudioPlayer:
 
                 was_paused = self.is_paused
 
-                pygame.mixer.music.stop()
-                pygame.mixer.music.load(self.current_filepath)
-                pygame.mixer.music.play(start=seek_time)
+                try:
+                    # Seek inside the decoder without reopening the file.
+                    # get_pos() keeps counting from the original play().
+                    pygame.mixer.music.set_pos(seek_time)
+                    self.play_offset = seek_time - max(pygame.mixer.music.get_pos(), 0) / 1000
+                except pygame.error:
+                    # Codec without seek support: reload and restart
+                    pygame.mixer.music.stop()
+                    pygame.mixer.music.load(self.current_filepath)
+                    pygame.mixer.music.play(start=seek_time)
+                    self.play_offset = seek_time
 
                 if was_paused:
                     pygame.mixer.music.pause()
-                else:
-                    self.start_time = time.time() - seek_time
 
             self.seeking = False
 
@@ -901,7 +1372,7 @@ class AudioPlayer:
 
             if self.audio_length > 0:
                 seek_time = (progress / 100) * self.audio_length
-                self.current_time_label.config(text=self.format_time(seek_time))
+                self.set_current_time(seek_time)
 
     def load_audio(self):
         """Load an audio file."""
@@ -920,6 +1391,7 @@ class AudioPlayer:
             self.separate_btn.config_state("normal")
             self.original_btn.config_state("normal")
             self.status_label.config(text=f"Loaded: {filename}")
+            self.invalidate_audio_length()
 
             # Reset separated files
             self.vocal_file = None
@@ -945,31 +1417,46 @@ class AudioPlayer:
         self.separate_btn.config_state("disabled")
         self.progress_label.config(text="Processing... Please wait", fg=self.accent_orange)
 
-        thread = threading.Thread(target=self._separate_audio_thread)
-        thread.daemon = True
-        thread.start()
+        future = self._dsp_pool.submit(self._separate_audio_thread)
+        future.add_done_callback(
+            lambda f: self._post_ui(self._on_separation_done, f))
 
-    def _separate_audio_thread(self):
-        """Background thread for audio separation."""
-        try:
-            base_name = os.path.splitext(self.original_file)[0]
-            self.vocal_file = f"{base_name}_vocal.wav"
-            self.instrumental_file = f"{base_name}_instrumental.wav"
+    def _get_repet(self, n_fft, hop_length):
+        """Return the cached REPET instance for these STFT settings."""
+        key = (n_fft, hop_length)
+        repet = self._repets.get(key)
+        if repet is None:
+            repet = self._repets[key] = REPET(n_fft=n_fft, hop_length=hop_length)
+        return repet
 
-            repet = REPET(n_fft=2048, hop_length=512)
-            repet.separate(self.original_file,
-                          output_vocal=self.vocal_file,
-                          output_instrumental=self.instrumental_file)
-
-            self.root.after(0, self._separation_complete)
+    def _separate_audio_thread(self):
+        """Background worker for audio separation."""
+        base_name = os.path.splitext(self.original_file)[0]
+        self.vocal_file = f"{base_name}_vocal.wav"
+        self.instrumental_file = f"{base_name}_instrumental.wav"
+
+        # Header-only probe; scales the window with the sample rate
+        n_fft = _repet_n_fft(self.original_file)
+        repet = self._get_repet(n_fft, n_fft // 4)
+        repet.separate(self.original_file,
+                      output_vocal=self.vocal_file,
+                      output_instrumental=self.instrumental_file)
+
+    def _on_separation_done(self, future):
+        """Called on the Tk thread when a separation job finishes."""
+        if future.cancelled():
+            return
 
-        except Exception as e:
-            error_msg = f"Error during separation: {str(e)}"
-            self.root.after(0, lambda: self._separation_error(error_msg))
+        error = future.exception()
+        if error is not None:
+            self._separation_error(f"Error during separation: {str(error)}")
+        else:
+            self._separation_complete()
 
     def _separation_complete(self):
         """Called when separation is complete."""
         self.progress_label.config(text="Separation complete!", fg=self.accent_green)
+        self.invalidate_audio_length(self.vocal_file, self.instrumental_file)
         self.separate_btn.config_state("normal")
         self.vocal_btn.config_state("normal")
         self.instrumental_btn.config_state("normal")
@@ -989,21 +1476,62 @@ class AudioPlayer:
         self.status_label.config(text="Error during separation")
         messagebox.showerror("Error", error_msg)
 
-    def get_audio_length(self, filepath):
-        """Get the length of an audio file in seconds."""
+    def _file_key(self, filepath):
+        """Cache key for a file's contents, or None if the file can't be stat'ed."""
         try:
-            audio = MutagenFile(filepath)
-            if audio is not None and hasattr(audio.info, 'length'):
-                return audio.info.length
-        except:
-            pass
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return (filepath, st.st_mtime_ns, st.st_size)
 
-        try:
-            sound = pygame.mixer.Sound(filepath)
-            return sound.get_length()
-        except:
+    def get_audio_length(self, filepath):
+        """Get the length of an audio file in seconds."""
+        key = self._file_key(filepath)
+        if key is None:
             return 0
 
+        length = self._length_cache.get(key)
+        if length is None:
+            length = _probe_audio_length(filepath)
+            self._length_cache[key] = length
+        return length
+
+    def request_audio_length(self, filepath):
+        """Show the track length, probing uncached files on a worker thread."""
+        key = self._file_key(filepath)
+        length = self._length_cache.get(key) if key is not None else 0
+        if length is not None:
+            self._apply_audio_length(filepath, length)
+            return
+
+        self.total_time_label.config(text="--:--")
+        future = self._probe_pool.submit(_probe_audio_length, filepath)
+        future.add_done_callback(
+            lambda f: self._post_ui(self._on_length_probed, f, filepath, key))
+
+    def _on_length_probed(self, future, filepath, key):
+        """Called on the Tk thread when a length probe finishes."""
+        if future.cancelled():
+            return
+        length = future.result()
+        self._length_cache[key] = length
+        self._apply_audio_length(filepath, length)
+
+    def _apply_audio_length(self, filepath, length):
+        """Set the length of the current track (ignored if the track changed)."""
+        if filepath != self.current_filepath:
+            return
+        self.audio_length = length
+        self.total_time_label.config(text=self.format_time(length))
+
+    def invalidate_audio_length(self, *filepaths):
+        """Drop cached lengths for the given files (all files if none given)."""
+        if not filepaths:
+            self._length_cache.clear()
+            return
+        for key in [k for k in self._length_cache if k[0] in filepaths]:
+            del self._length_cache[key]
+
     def play_track(self, track_type):
         """Play a specific track."""
         if self.is_playing:
@@ -1042,13 +1570,13 @@ class AudioPlayer:
             self.current_filepath = filepath
             self.is_playing = True
             self.is_paused = False
-            self.start_time = time.time()
+            self.play_offset = 0
 
-            self.audio_length = self.get_audio_length(filepath)
-            self.total_time_label.config(text=self.format_time(self.audio_length))
+            self.audio_length = 0
+            self.request_audio_length(filepath)
 
             self.progress_var.set(0)
-            self.current_time_label.config(text="0:00")
+            self.set_current_time(0)
             self.draw_progress_bar()
 
             self.update_progress()
@@ -1067,19 +1595,31 @@ class AudioPlayer:
     def update_progress(self):
         """Update progress bar and time labels."""
         if self.is_playing and not self.is_paused and not self.seeking:
-            elapsed = time.time() - self.start_time
+            # Read the mixer position once per tick
+            self._cur_ms = pygame.mixer.music.get_pos()
+            elapsed = self.play_offset + max(self._cur_ms, 0) / 1000.0
 
             if self.audio_length > 0 and elapsed <= self.audio_length:
                 progress_percent = (elapsed / self.audio_length) * 100
                 self.progress_var.set(progress_percent)
-                self.draw_progress_bar()
-                self.current_time_label.config(text=self.format_time(elapsed))
-
-            if pygame.mixer.music.get_busy():
-                self.update_progress_job = self.root.after(100, self.update_progress)
+                self.request_progress_redraw()
+                self.set_current_time(elapsed)
+
+            # get_pos() drops to -1 once the track has finished, so the
+            # position read above doubles as the end-of-stream check
+            if self._cur_ms != -1:
+                self.update_progress_job = self.root.after(PROGRESS_INTERVAL_MS,
+                                                           self.update_progress)
             else:
                 self.stop_playback()
 
+    def set_current_time(self, seconds):
+        """Update the elapsed time label only when the whole second changes."""
+        sec = int(seconds)
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self.current_time_label.config(text=self.format_time(sec))
+
     def format_time(self, seconds):
         """Format seconds to MM:SS."""
         mins = int(seconds // 60)
@@ -1094,8 +1634,6 @@ class AudioPlayer:
         if self.is_paused:
             pygame.mixer.music.unpause()
             self.is_paused = False
-            elapsed_before_pause = self.progress_var.get() / 100 * self.audio_length
-            self.start_time = time.time() - elapsed_before_pause
             self.play_pause_btn.text = "⏸ Pause"
             self.play_pause_btn.draw()
             self.status_label.config(text="Playing...")
@@ -1119,7 +1657,7 @@ class AudioPlayer:
 
         self.progress_var.set(0)
         self.draw_progress_bar()
-        self.current_time_label.config(text="0:00")
+        self.set_current_time(0)
 
         self.play_pause_btn.text = "▶ Play"
         self.play_pause_btn.config_state("disabled")
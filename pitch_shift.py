@@ -5,11 +5,207 @@ Pitch shifting implementation with three methods:
 3. WSOLA (Waveform Similarity Overlap-Add) - like SoundTouch
 """
 
+import functools
+import math
+from fractions import Fraction
+
 import numpy as np
 import librosa
 import soundfile as sf
-from scipy.signal import get_window, correlate
-from scipy.interpolate import interp1d
+from numba import get_num_threads, njit, prange
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import next_fast_len
+from scipy.signal import get_window, correlate, resample_poly
+
+try:
+    import pyworld
+except ImportError:  # pyworld is optional; pitch detection falls back to YIN
+    pyworld = None
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def _psola_grain(audio, mark, grain_len, overlap_len, pitch_shift_factor,
+                 analysis_window, blend_window, out, weights, offset):
+    """
+    Window, resample and overlap-add the grain centered on one pitch mark.
+
+    The grain spans grain_len // 2 + overlap_len samples either side of the
+    mark, is Hann-windowed, linearly resampled by 1 / pitch_shift_factor and
+    added back centered on the same mark with a second Hann blend window,
+    whose weights are accumulated separately.
+
+    Args:
+        audio: float32 audio signal
+        mark: Pitch mark position
+        grain_len: Main grain length (two periods)
+        overlap_len: Extra context on each side of the grain
+        pitch_shift_factor: Pitch shift factor
+        analysis_window: Hann window for full-length grains
+        blend_window: Hann window for full-length resampled grains
+        out: Output accumulator covering samples [offset, offset + len(out))
+        weights: Blend-window weight accumulator, same span as out
+        offset: Signal position of out[0]
+    """
+    n = len(audio)
+
+    grain_start = max(0, mark - grain_len // 2 - overlap_len)
+    grain_end = min(n, mark + grain_len // 2 + overlap_len)
+    actual_len = grain_end - grain_start
+    if actual_len < grain_len // 2:
+        return
+
+    new_len = int(actual_len / pitch_shift_factor)
+    if new_len <= 8:
+        return
+
+    # Interior grains all share the precomputed window lengths; only grains
+    # clipped at the signal edges evaluate their windows directly
+    cached_analysis = actual_len == len(analysis_window)
+    cached_blend = new_len == len(blend_window)
+
+    out_start = mark - new_len // 2
+    step = (actual_len - 1) / (new_len - 1)
+    for j in range(new_len):
+        out_pos = out_start + j
+        if out_pos < 0 or out_pos >= n:
+            continue
+
+        # Linear interpolation of the analysis-windowed grain
+        x = j * step
+        k = int(x)
+        if k >= actual_len - 1:
+            k = actual_len - 1
+            frac = 0.0
+        else:
+            frac = x - k
+        if cached_analysis:
+            w0 = analysis_window[k]
+        else:
+            w0 = 0.5 - 0.5 * np.cos(2.0 * np.pi * k / actual_len)
+        sample = audio[grain_start + k] * w0
+        if frac > 0.0:
+            if cached_analysis:
+                w1 = analysis_window[k + 1]
+            else:
+                w1 = 0.5 - 0.5 * np.cos(2.0 * np.pi * (k + 1) / actual_len)
+            sample += frac * (audio[grain_start + k + 1] * w1 - sample)
+
+        if cached_blend:
+            blend = blend_window[j]
+        else:
+            blend = 0.5 - 0.5 * np.cos(2.0 * np.pi * j / new_len)
+        out[out_pos - offset] += sample * blend
+        weights[out_pos - offset] += blend
+
+
+@njit(parallel=True, cache=True, fastmath=True, boundscheck=False)
+def _psola_ola_kernel(audio, marks, grain_len, overlap_len, pitch_shift_factor,
+                      analysis_window, blend_window, output, weight_sum, n_chunks):
+    """
+    Overlap-add one grain per interior pitch mark, in parallel.
+
+    Marks are split into contiguous chunks. Each chunk accumulates into its
+    own span of a scratch buffer (its output range plus one grain's reach on
+    either side), so threads never write the same sample; the spans are then
+    added into output/weight_sum.
+
+    Args:
+        audio: float32 audio signal
+        marks: Pitch mark positions (ascending)
+        grain_len: Main grain length (two periods)
+        overlap_len: Extra context on each side of the grain
+        pitch_shift_factor: Pitch shift factor
+        analysis_window: Hann window for full-length grains
+        blend_window: Hann window for full-length resampled grains
+        output: Output accumulator, same length as audio
+        weight_sum: Blend-window weight accumulator, same length as audio
+        n_chunks: Number of mark chunks to spread across threads
+    """
+    n = len(audio)
+    first = 1
+    count = len(marks) - 3
+    if count <= 0:
+        return
+
+    # Farthest a resampled grain can land from its mark
+    reach = int(2 * (grain_len // 2 + overlap_len) / pitch_shift_factor) + 1
+
+    n_chunks = max(1, min(count, n_chunks))
+    bounds = np.empty(n_chunks + 1, dtype=np.int64)
+    for c in range(n_chunks + 1):
+        bounds[c] = first + c * count // n_chunks
+
+    span_start = np.empty(n_chunks, dtype=np.int64)
+    offsets = np.zeros(n_chunks + 1, dtype=np.int64)
+    for c in range(n_chunks):
+        span_start[c] = max(0, marks[bounds[c]] - reach)
+        span_end = min(n, marks[bounds[c + 1] - 1] + reach)
+        offsets[c + 1] = offsets[c] + max(span_end - span_start[c], 0)
+
+    scratch = np.zeros(offsets[-1], dtype=output.dtype)
+    scratch_weights = np.zeros(offsets[-1], dtype=weight_sum.dtype)
+    for c in prange(n_chunks):
+        out = scratch[offsets[c]:offsets[c + 1]]
+        weights = scratch_weights[offsets[c]:offsets[c + 1]]
+        for i in range(bounds[c], bounds[c + 1]):
+            _psola_grain(audio, marks[i], grain_len, overlap_len,
+                         pitch_shift_factor, analysis_window, blend_window,
+                         out, weights, span_start[c])
+
+    for c in range(n_chunks):
+        size = offsets[c + 1] - offsets[c]
+        start = span_start[c]
+        output[start:start + size] += scratch[offsets[c]:offsets[c + 1]]
+        weight_sum[start:start + size] += scratch_weights[offsets[c]:offsets[c + 1]]
+
+
+@njit(cache=True, boundscheck=False)
+def _walk_pitch_marks(periods, hop, limit):
+    """
+    Step through the signal one local period at a time.
+
+    Each step uses the period of the grid cell the current mark falls in,
+    not one measured at the mark itself, so the marks only approximate a
+    per-mark autocorrelation walk. The FFT periods can also pick a
+    neighbouring lag where two lags tie within float rounding.
+
+    Args:
+        periods: Local period (samples) for each grid cell
+        hop: Grid spacing in samples
+        limit: Marks are emitted while below this position
+
+    Returns:
+        Array of pitch mark positions (in samples)
+    """
+    marks = np.empty(limit // max(periods.min(), 1) + 1, dtype=np.int64)
+    count = 0
+    pos = 0
+    while pos < limit:
+        marks[count] = pos
+        count += 1
+        pos += periods[pos // hop]
+    return marks[:count]
+
+
+# Frames per block in the single-buffer phase vocoder
+PV_BLOCK_FRAMES = 256
+
+# Frames per batched FFT when autocorrelating for pitch marks
+MARK_BLOCK_FRAMES = 1024
+
+
+@functools.lru_cache(maxsize=128)
+def _hann(n):
+    """Periodic Hann window of length n (float32, read-only, cached)."""
+    window = get_window('hann', n).astype(np.float32)
+    window.flags.writeable = False
+    return window
+
+
+def _resample_poly(audio, orig_sr, target_sr):
+    """Resample between integer sample rates with a polyphase FIR."""
+    g = math.gcd(int(orig_sr), int(target_sr))
+    return resample_poly(audio, int(target_sr) // g, int(orig_sr) // g).astype(np.float32)
 
 
 class PitchShifter:
@@ -26,61 +222,6 @@ class PitchShifter:
         """
         self.sr = sr
 
-    def detect_pitch_enhanced(self, audio, frame_length=2048, hop_length=512):
-        """
-        Enhanced pitch detection using librosa's pyin with better interpolation.
-
-        Args:
-            audio: Audio signal
-            frame_length: Length of each frame for analysis
-            hop_length: Hop length between frames
-
-        Returns:
-            f0: Array of fundamental frequencies (Hz) for each frame
-            voiced_flag: Boolean array indicating voiced frames
-        """
-        # Use librosa's pyin for pitch tracking
-        f0, voiced_flag, voiced_probs = librosa.pyin(
-            audio,
-            fmin=librosa.note_to_hz('C2'),
-            fmax=librosa.note_to_hz('C7'),
-            sr=self.sr,
-            frame_length=frame_length,
-            hop_length=hop_length,
-            fill_na=None
-        )
-
-        # Better interpolation for unvoiced segments
-        if voiced_flag is not None and not voiced_flag.all():
-            voiced_indices = np.where(voiced_flag)[0]
-            if len(voiced_indices) > 1:
-                # Interpolate only where we have voiced segments
-                interp_func = interp1d(
-                    voiced_indices,
-                    f0[voiced_indices],
-                    kind='cubic',
-                    bounds_error=False,
-                    fill_value=(f0[voiced_indices[0]], f0[voiced_indices[-1]])
-                )
-                all_indices = np.arange(len(f0))
-                f0 = interp_func(all_indices)
-            else:
-                # If not enough voiced segments, use median
-                median_pitch = np.median(f0[voiced_flag]) if any(voiced_flag) else 200.0
-                f0 = np.full_like(f0, median_pitch, dtype=float)
-
-        # Handle any remaining NaN values
-        mask = np.isnan(f0)
-        if mask.any():
-            if not mask.all():
-                f0[mask] = np.interp(np.flatnonzero(mask),
-                                    np.flatnonzero(~mask),
-                                    f0[~mask])
-            else:
-                f0 = np.full_like(f0, 200.0)
-
-        return f0, voiced_flag
-
     def detect_pitch_from_audio(self, audio):
         """
         Detect average pitch from an audio signal.
@@ -91,15 +232,30 @@ class PitchShifter:
         Returns:
             Average pitch in Hz
         """
-        f0, voiced_flag = self.detect_pitch_enhanced(audio)
-
-        # Take median of voiced segments only
-        if voiced_flag is not None and any(voiced_flag):
-            median_pitch = np.median(f0[voiced_flag])
-        else:
-            median_pitch = np.median(f0[~np.isnan(f0)]) if not np.isnan(f0).all() else 200.0
-
-        return median_pitch
+        if pyworld is not None:
+            # DIO + StoneMask makes its own voiced/unvoiced decision
+            x = np.asarray(audio, dtype=np.float64)
+            f0, t = pyworld.dio(x, self.sr,
+                                f0_floor=librosa.note_to_hz('C2'),
+                                f0_ceil=librosa.note_to_hz('C7'))
+            f0 = pyworld.stonemask(x, f0, t, self.sr)
+            voiced = f0[f0 > 0]
+            return float(np.median(voiced)) if voiced.size else 200.0
+
+        # Only the median is needed, so plain YIN (no pyin Viterbi decoding)
+        # is enough; frames more than 20 dB below the loudest count as unvoiced
+        audio = np.asarray(audio, dtype=np.float32)
+        frame_length, hop_length = 2048, 512
+        f0 = librosa.yin(audio,
+                         fmin=librosa.note_to_hz('C2'),
+                         fmax=librosa.note_to_hz('C7'),
+                         sr=self.sr,
+                         frame_length=frame_length,
+                         hop_length=hop_length)
+        rms = librosa.feature.rms(y=audio, frame_length=frame_length,
+                                  hop_length=hop_length)[0]
+        voiced = f0[(rms > 0.1 * rms.max()) & np.isfinite(f0)]
+        return float(np.median(voiced)) if voiced.size else 200.0
 
     def find_pitch_marks_yin(self, audio, fmin=80, fmax=400):
         """
@@ -113,38 +269,33 @@ class PitchShifter:
         Returns:
             Array of pitch mark positions (in samples)
         """
-        marks = []
-
         # Estimate period range
         max_period = int(self.sr / fmin)
         min_period = int(self.sr / fmax)
 
-        pos = 0
-
-        while pos < len(audio) - max_period:
-            # Extract segment
-            segment_len = min(max_period * 2, len(audio) - pos)
-            segment = audio[pos:pos + segment_len]
-
-            if len(segment) < max_period:
-                break
-
-            # Compute autocorrelation
-            autocorr = np.correlate(segment, segment, mode='full')
-            autocorr = autocorr[len(autocorr)//2:]
-
-            # Find peak in valid range
-            valid_autocorr = autocorr[min_period:max_period]
-            if len(valid_autocorr) > 0:
-                local_peak = np.argmax(valid_autocorr)
-                period = min_period + local_peak
-            else:
-                period = (min_period + max_period) // 2
-
-            marks.append(pos)
-            pos += period
-
-        return np.array(marks, dtype=int)
+        audio = np.asarray(audio, dtype=np.float32)
+        if len(audio) <= max_period:
+            return np.array([], dtype=int)
+
+        # Local period on a max_period // 2 grid: 2 * max_period segments
+        # autocorrelated with batched FFTs (padded so lags below max_period
+        # don't wrap), then the strongest lag in [min_period, max_period)
+        segment_len = 2 * max_period
+        hop = max(max_period // 2, 1)
+        n_fft = next_fast_len(segment_len + max_period)
+        n_grid = (len(audio) - max_period - 1) // hop + 1
+        frames = sliding_window_view(np.pad(audio, (0, segment_len)), segment_len)[::hop][:n_grid]
+
+        periods = np.full(n_grid, (min_period + max_period) // 2, dtype=np.int64)
+        if max_period > min_period:
+            for start in range(0, n_grid, MARK_BLOCK_FRAMES):
+                stop = min(start + MARK_BLOCK_FRAMES, n_grid)
+                spec = np.fft.rfft(frames[start:stop], n=n_fft, axis=1)
+                autocorr = np.fft.irfft(spec.real ** 2 + spec.imag ** 2, n=n_fft, axis=1)
+                periods[start:stop] = min_period + np.argmax(autocorr[:, min_period:max_period], axis=1)
+
+        # Walk the signal one local period at a time (compiled loop)
+        return _walk_pitch_marks(periods, hop, len(audio) - max_period)
 
     def td_psola(self, audio, pitch_shift_factor):
         """
@@ -185,77 +336,17 @@ class PitchShifter:
         overlap_len = avg_period  # Extra overlap on each side
 
         # Output buffer (same length as input!)
-        output = np.zeros(len(audio))
+        output = np.zeros(len(audio), dtype=np.float32)
 
         # Overlap weight buffer to track contribution from each grain
-        weight_sum = np.zeros(len(audio))
-
-        # Process each pitch mark with three-buffer system
-        for i in range(1, len(marks) - 2):
-            # Get three consecutive marks: past, present, future
-            mark_past = marks[i - 1]
-            mark_present = marks[i]
-            mark_future = marks[i + 1]
-
-            # Calculate local period
-            period = mark_present - mark_past
-            next_period = mark_future - mark_present
-            local_period = (period + next_period) // 2
-
-            # Extract extended grain including context from past and future
-            # This helps maintain continuity
-            grain_start = max(0, mark_present - grain_len // 2 - overlap_len)
-            grain_end = min(len(audio), mark_present + grain_len // 2 + overlap_len)
-            extended_grain = audio[grain_start:grain_end]
-
-            # Calculate actual grain length
-            actual_grain_len = len(extended_grain)
-
-            if actual_grain_len < grain_len // 2:
-                continue
-
-            # Create smooth window with extended tails for better overlap
-            window = get_window('hann', actual_grain_len)
-
-            # Apply window
-            windowed_grain = extended_grain * window
-
-            # RESAMPLE grain to change pitch
-            new_len = int(actual_grain_len / pitch_shift_factor)
-            if new_len > 8:  # Minimum size check
-                # High-quality resampling
-                old_indices = np.linspace(0, actual_grain_len - 1, actual_grain_len)
-                new_indices = np.linspace(0, actual_grain_len - 1, new_len)
-                resampled_grain = np.interp(new_indices, old_indices, windowed_grain)
-
-                # Create blend window for this grain
-                blend_window = get_window('hann', len(resampled_grain))
-
-                # Calculate output position (centered at original mark)
-                out_center = mark_present
-                out_start = out_center - len(resampled_grain) // 2
-                out_end = out_start + len(resampled_grain)
-
-                # Bounds checking with clipping
-                grain_start_clip = 0
-                grain_end_clip = len(resampled_grain)
-
-                if out_start < 0:
-                    grain_start_clip = -out_start
-                    out_start = 0
-
-                if out_end > len(output):
-                    grain_end_clip = len(resampled_grain) - (out_end - len(output))
-                    out_end = len(output)
-
-                if out_end > out_start and grain_end_clip > grain_start_clip:
-                    # Get the portion to add
-                    grain_portion = resampled_grain[grain_start_clip:grain_end_clip]
-                    window_portion = blend_window[grain_start_clip:grain_end_clip]
-
-                    # Weighted overlap-add
-                    output[out_start:out_end] += grain_portion * window_portion
-                    weight_sum[out_start:out_end] += window_portion
+        weight_sum = np.zeros(len(audio), dtype=np.float32)
+
+        # Window, resample and overlap-add each grain (compiled loop)
+        full_len = 2 * (grain_len // 2 + overlap_len)
+        _psola_ola_kernel(np.ascontiguousarray(audio, dtype=np.float32), marks,
+                          grain_len, overlap_len, pitch_shift_factor,
+                          _hann(full_len), _hann(int(full_len / pitch_shift_factor)),
+                          output, weight_sum, 4 * get_num_threads())
 
         # Normalize by overlap weights to prevent amplitude modulation
         # This is crucial for smooth output
@@ -281,19 +372,121 @@ class PitchShifter:
         Returns:
             Pitch-shifted audio
         """
-        # Convert factor to semitones
-        semitones = 12 * np.log2(pitch_shift_factor)
+        # float32 in, float32 out: librosa keeps the STFT in complex64
+        audio = np.asarray(audio, dtype=np.float32)
 
-        # Use librosa's pitch_shift
-        shifted = librosa.effects.pitch_shift(
+        # Stretch by the shift factor with librosa's phase vocoder...
+        stretched = librosa.effects.time_stretch(
             y=audio,
-            sr=self.sr,
-            n_steps=semitones,
+            rate=1.0 / pitch_shift_factor,
             n_fft=2048,
             hop_length=512
         )
 
-        return shifted
+        # ...then restore the duration with a polyphase resample, which is
+        # much cheaper than librosa's default high-quality resampler
+        ratio = Fraction(1.0 / pitch_shift_factor).limit_denominator(1000)
+        shifted = resample_poly(stretched, ratio.numerator, ratio.denominator)
+
+        return librosa.util.fix_length(shifted.astype(np.float32, copy=False), size=len(audio))
+
+    def phase_vocoder_inplace(self, audio, pitch_shift_factor, n_fft=2048):
+        """
+        Pitch shift with a single-buffer rfft phase vocoder.
+
+        Frames are taken from the signal at analysis hops of
+        hop / pitch_shift_factor and resynthesized at hop = n_fft // 4, so the
+        output is stretched by the shift factor; a polyphase resample then
+        restores the original duration. Phases are propagated
+        (Laroche & Dolson) by overwriting the analysis spectrum in place, and
+        frames are processed in blocks of PV_BLOCK_FRAMES so peak memory stays
+        close to the size of the output.
+
+        Args:
+            audio: Input audio signal
+            pitch_shift_factor: Pitch shift factor
+            n_fft: FFT size
+
+        Returns:
+            Pitch-shifted float32 audio with same length as input
+        """
+        if abs(pitch_shift_factor - 1.0) < 0.001:
+            return audio
+
+        audio = np.asarray(audio, dtype=np.float32)
+        hop = n_fft // 4
+        window = _hann(n_fft)
+
+        # Frame positions in the (centered) input for each synthesis frame
+        padded = np.pad(audio, n_fft // 2)
+        n_frames = int(np.ceil(len(audio) * pitch_shift_factor / hop)) + 1
+        positions = np.round(np.arange(n_frames) * (hop / pitch_shift_factor)).astype(np.int64)
+        positions = np.minimum(positions, len(padded) - n_fft)
+
+        # Measured phase advance per analysis hop gives each bin's true
+        # frequency, which is re-accumulated at the synthesis hop. Frame 0
+        # has no predecessor and keeps its analysis phase.
+        omega = (2 * np.pi * np.arange(n_fft // 2 + 1) / n_fft).astype(np.float32)
+        analysis_hops = np.maximum(np.diff(positions, prepend=0), 1).astype(np.float32)[:, None]
+        windows = sliding_window_view(padded, n_fft)
+
+        # Frames are processed a block at a time and overlap-added into the
+        # preallocated output; only the last analysis and synthesis phases
+        # carry over between blocks
+        stretched = np.zeros((n_frames + 3, hop), dtype=np.float32)
+        prev_phase = None
+        synth_phase = None
+        for start in range(0, n_frames, PV_BLOCK_FRAMES):
+            stop = min(start + PV_BLOCK_FRAMES, n_frames)
+
+            # Analysis: batched rfft over the block
+            spec = np.fft.rfft(windows[positions[start:stop]] * window, axis=1)
+            phase = np.angle(spec).astype(np.float32, copy=False)
+
+            # Phase propagation
+            delta = np.diff(phase, axis=0,
+                            prepend=phase[:1] if prev_phase is None else prev_phase[None])
+            hops = analysis_hops[start:stop]
+            delta -= omega * hops
+            delta -= 2 * np.pi * np.round(delta / (2 * np.pi))
+            delta /= hops
+            delta += omega
+            delta *= hop
+            if synth_phase is None:
+                delta[0] = phase[0]
+            else:
+                delta[0] += synth_phase
+            np.cumsum(delta, axis=0, out=delta)
+            prev_phase = phase[-1]
+            synth_phase = delta[-1]
+
+            # Rebuild the frames from real cos/sin written straight into the
+            # real and imaginary parts; complex exp is far slower than the
+            # real ufuncs
+            magnitude = np.abs(spec)
+            np.multiply(magnitude, np.cos(delta), out=spec.real)
+            np.multiply(magnitude, np.sin(delta), out=spec.imag)
+
+            # Synthesis: batched irfft, then overlap-add the four hop-sized
+            # pieces of every frame
+            frames = np.fft.irfft(spec, n=n_fft, axis=1).astype(np.float32, copy=False)
+            frames *= window
+            blocks = frames.reshape(stop - start, 4, hop)
+            for j in range(4):
+                stretched[start + j:stop + j] += blocks[:, j]
+
+        norm = np.zeros((n_frames + 3, hop), dtype=np.float32)
+        window_sq = (window ** 2).reshape(4, hop)
+        for j in range(4):
+            norm[j:j + n_frames] += window_sq[j]
+        stretched = stretched.ravel()
+        stretched /= np.maximum(norm.ravel(), 1e-8)
+        stretched = stretched[n_fft // 2:n_fft // 2 + int(round(len(audio) * pitch_shift_factor))]
+
+        # Polyphase resample back to the input duration
+        ratio = Fraction(1.0 / pitch_shift_factor).limit_denominator(1000)
+        shifted = resample_poly(stretched, ratio.numerator, ratio.denominator).astype(np.float32)
+        return librosa.util.fix_length(shifted, size=len(audio))
 
     def wsola(self, audio, pitch_shift_factor):
         """
@@ -322,9 +515,12 @@ class PitchShifter:
         resampled_len = int(len(audio) / pitch_shift_factor)
 
         if resampled_len > 0:
-            audio_indices = np.linspace(0, len(audio) - 1, len(audio))
-            resample_indices = np.linspace(0, len(audio) - 1, resampled_len)
-            resampled = np.interp(resample_indices, audio_indices, audio)
+            # Anti-aliased polyphase resample by the nearest small ratio
+            ratio = Fraction(1.0 / pitch_shift_factor).limit_denominator(1000)
+            resampled = resample_poly(np.asarray(audio, dtype=np.float32),
+                                      ratio.numerator, ratio.denominator)
+            resampled = librosa.util.fix_length(resampled.astype(np.float32, copy=False),
+                                                size=resampled_len)
         else:
             return audio
 
@@ -345,15 +541,18 @@ class PitchShifter:
         template_size = frame_size // 4
         search_range = 50  # Search range for best match
 
-        window = get_window('hann', frame_size)
+        window = _hann(frame_size)
 
         # Calculate output
         num_frames = int((target_len - frame_size) / hop_synthesis)
-        output = np.zeros(target_len)
+        output = np.zeros(target_len, dtype=np.float32)
 
         input_pos = 0
         output_pos = 0
 
+        # Zero tail so the last frames need no per-frame padding
+        resampled_padded = np.concatenate([resampled, np.zeros(frame_size, dtype=resampled.dtype)])
+
         for i in range(num_frames):
             # Natural input position
             natural_pos = int(i * hop_analysis)
@@ -368,34 +567,21 @@ class PitchShifter:
                 search_start = max(0, natural_pos - search_range)
                 search_end = min(len(resampled) - frame_size, natural_pos + search_range)
 
-                best_corr = -np.inf
-                best_pos = natural_pos
-
-                for pos in range(search_start, search_end):
-                    # Get candidate
-                    candidate = resampled[pos:pos + len(template)]
-                    if len(candidate) == len(template):
-                        # Cross-correlation
-                        corr = np.sum(template * candidate)
-                        if corr > best_corr:
-                            best_corr = corr
-                            best_pos = pos
-
-                input_pos = best_pos
+                # Cross-correlate the template against every candidate
+                # offset in one call
+                if search_end > search_start:
+                    segment = resampled[search_start:search_end + len(template) - 1]
+                    corrs = correlate(segment, template, mode='valid')
+                    input_pos = search_start + int(np.argmax(corrs))
+                else:
+                    input_pos = natural_pos
             else:
                 input_pos = natural_pos
 
-            # Extract frame
-            if input_pos + frame_size <= len(resampled):
-                frame = resampled[input_pos:input_pos + frame_size] * window
-            else:
-                # Pad if at end
-                remaining = len(resampled) - input_pos
-                if remaining > 0:
-                    frame = np.pad(resampled[input_pos:], (0, frame_size - remaining), mode='constant')
-                    frame = frame * window
-                else:
-                    break
+            # Extract frame (frames running past the end read the zero tail)
+            if input_pos >= len(resampled):
+                break
+            frame = resampled_padded[input_pos:input_pos + frame_size] * window
 
             # Overlap-add
             end_pos = min(len(output), output_pos + frame_size)
@@ -465,6 +651,34 @@ class PitchShifter:
 
         return self.shift_pitch_semitones(audio, semitones, method=method)
 
+    def load_audio(self, input_path):
+        """
+        Load an audio file as mono float32 at the shifter's sample rate.
+
+        soundfile reads WAV/FLAC directly; librosa only resamples when the
+        file is not already at the target rate.
+
+        Args:
+            input_path: Input audio file path
+
+        Returns:
+            audio: Audio signal
+            sr: Sample rate
+        """
+        try:
+            audio, sr = sf.read(input_path, dtype='float32', always_2d=False)
+            if audio.ndim > 1:
+                audio = audio.mean(axis=1)
+            if sr != self.sr:
+                audio = _resample_poly(audio, sr, self.sr)
+                sr = self.sr
+        except RuntimeError:
+            # Container not supported by libsndfile (e.g. m4a)
+            audio, sr = librosa.load(input_path, sr=self.sr, mono=True)
+
+        print(f"Loaded audio: {len(audio)} samples ({len(audio)/sr:.2f}s), {sr} Hz")
+        return audio, sr
+
     def process_file(self, input_path, output_path, semitones=0,
                     target_pitch_hz=None, pitch_shift_factor=None, method='phase_vocoder'):
         """
@@ -479,9 +693,7 @@ class PitchShifter:
             method: 'td_psola', 'phase_vocoder', or 'wsola'
         """
         # Load audio
-        audio, sr = librosa.load(input_path, sr=self.sr, mono=True)
-
-        print(f"Loaded audio: {len(audio)} samples ({len(audio)/sr:.2f}s), {sr} Hz")
+        audio, sr = self.load_audio(input_path)
 
         # Apply pitch shift
         if target_pitch_hz is not None:
@@ -498,6 +710,40 @@ class PitchShifter:
         sf.write(output_path, shifted, sr)
         print(f"Saved pitch-shifted audio to: {output_path}")
 
+    def process_file_inplace(self, input_path, output_path, semitones=0,
+                             target_pitch_hz=None, pitch_shift_factor=None):
+        """
+        Process an audio file with the single-buffer phase vocoder.
+
+        Same parameters as process_file, but always uses
+        phase_vocoder_inplace and keeps the signal in float32 throughout.
+
+        Args:
+            input_path: Input audio file path
+            output_path: Output audio file path
+            semitones: Semitones to shift (if specified)
+            target_pitch_hz: Target pitch in Hz (if specified)
+            pitch_shift_factor: Direct pitch shift factor (if specified)
+        """
+        audio, sr = self.load_audio(input_path)
+
+        if target_pitch_hz is not None:
+            current_pitch = self.detect_pitch_from_audio(audio)
+            pitch_shift_factor = target_pitch_hz / current_pitch
+            print(f"Current pitch: {current_pitch:.2f} Hz")
+            print(f"Target pitch: {target_pitch_hz:.2f} Hz")
+        elif pitch_shift_factor is None:
+            pitch_shift_factor = 2 ** (semitones / 12.0)
+
+        print(f"Shifting by {12 * np.log2(pitch_shift_factor):+.2f} semitones "
+              f"using in-place phase vocoder")
+        shifted = self.phase_vocoder_inplace(audio, pitch_shift_factor)
+
+        print(f"Output audio: {len(shifted)} samples ({len(shifted)/sr:.2f}s)")
+
+        sf.write(output_path, shifted, sr)
+        print(f"Saved pitch-shifted audio to: {output_path}")
+
 
 def main():
     """Command-line interface for pitch shifting."""
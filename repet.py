@@ -3,10 +3,24 @@ REPET (REpeating Pattern Extraction Technique) Algorithm
 Separates vocals and instrumental from audio files
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import librosa
 import soundfile as sf
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import irfft, next_fast_len, rfft
 from scipy.ndimage import median_filter
+from scipy.signal import get_window
+
+try:
+    import bottleneck
+except ImportError:  # bottleneck is optional; the running median falls back to scipy
+    bottleneck = None
+
+
+# Frames per block when streaming the STFT through separate()
+STFT_BLOCK_FRAMES = 512
 
 
 class REPET:
@@ -26,6 +40,10 @@ class REPET:
         self.n_fft = n_fft
         self.hop_length = hop_length
 
+        # One analysis/synthesis window shared by every forward and inverse STFT
+        self.window = get_window('hann', n_fft, fftbins=True).astype(np.float32)
+        self._window_sq = self.window ** 2
+
     def load_audio(self, filepath):
         """
         Load audio file.
@@ -45,6 +63,38 @@ class REPET:
 
         return audio, sr
 
+    def _frames(self, audio):
+        """
+        Centered, zero-padded analysis frames as a strided view.
+
+        Args:
+            audio: Audio signal
+
+        Returns:
+            float32 array of shape (n_frames, n_fft)
+        """
+        # float32 frames keep the whole STFT -> mask -> iSTFT chain in
+        # float32/complex64
+        audio = np.asarray(audio, dtype=np.float32)
+        padded = np.pad(audio, self.n_fft // 2)
+        return sliding_window_view(padded, self.n_fft)[::self.hop_length]
+
+    def _stft_blocks(self, audio):
+        """
+        Compute the STFT in blocks of consecutive frames.
+
+        Args:
+            audio: Audio signal
+
+        Yields:
+            start: Index of the block's first frame
+            stft: Complex STFT of the block (complex64)
+        """
+        frames = self._frames(audio)
+        for start in range(0, len(frames), STFT_BLOCK_FRAMES):
+            block = frames[start:start + STFT_BLOCK_FRAMES]
+            yield start, rfft(block * self.window, axis=-1, workers=-1).T
+
     def compute_stft(self, audio):
         """
         Compute Short-Time Fourier Transform.
@@ -53,9 +103,128 @@ class REPET:
             audio: Audio signal
 
         Returns:
-            Complex STFT matrix
+            Complex STFT matrix (complex64)
+        """
+        # One batched rfft over all frames (scipy's pocketfft keeps float32
+        # and can spread rows across cores)
+        return rfft(self._frames(audio) * self.window, axis=-1, workers=-1).T
+
+    def compute_magnitude(self, audio):
+        """
+        Compute the STFT magnitude without keeping the complex STFT.
+
+        Args:
+            audio: Audio signal
+
+        Returns:
+            Magnitude spectrogram (float32)
+        """
+        num_frames = len(self._frames(audio))
+        magnitude = np.empty((self.n_fft // 2 + 1, num_frames), dtype=np.float32)
+        for start, block in self._stft_blocks(audio):
+            np.abs(block, out=magnitude[:, start:start + block.shape[1]])
+        return magnitude
+
+    def _overlap_add(self, stft, out, start):
+        """
+        Inverse-transform frames and overlap-add them into hop-sized rows.
+
+        Args:
+            stft: Complex STFT block (leading dimensions are batched)
+            out: Accumulator of shape (..., n_frames + n_fft // hop - 1, hop)
+            start: Index of the block's first frame
+        """
+        n_frames = stft.shape[-1]
+        n_blocks = self.n_fft // self.hop_length
+        frames = irfft(np.swapaxes(stft, -1, -2), n=self.n_fft, axis=-1, workers=-1)
+        frames *= self.window
+        blocks = frames.reshape(frames.shape[:-1] + (n_blocks, self.hop_length))
+        for j in range(n_blocks):
+            out[..., start + j:start + j + n_frames, :] += blocks[..., j, :]
+
+    def _finish_istft(self, out, length):
+        """
+        Normalize overlap-added rows by the summed squared window and trim.
+
+        Args:
+            out: Accumulator filled by _overlap_add
+            length: Output length in samples
+
+        Returns:
+            Audio signal(s) of the given length
+        """
+        n_blocks = self.n_fft // self.hop_length
+        n_rows = out.shape[-2]
+        n_frames = n_rows - n_blocks + 1
+        window_sq = self._window_sq.reshape(n_blocks, self.hop_length)
+        norm = np.zeros((n_rows, self.hop_length), dtype=out.dtype)
+        for j in range(n_blocks):
+            norm[j:j + n_frames] += window_sq[j]
+
+        out = out.reshape(out.shape[:-2] + (-1,))
+        norm = norm.ravel()
+        nonzero = norm > np.finfo(norm.dtype).tiny
+        out[..., nonzero] /= norm[nonzero]
+
+        start = self.n_fft // 2
+        return librosa.util.fix_length(out[..., start:start + length], size=length)
+
+    def compute_istft(self, stft, length):
+        """
+        Compute inverse Short-Time Fourier Transform.
+
+        Args:
+            stft: Complex STFT matrix (leading dimensions are batched)
+            length: Output length in samples
+
+        Returns:
+            Audio signal(s) of the given length
+        """
+        if self.n_fft % self.hop_length:
+            return librosa.istft(stft, hop_length=self.hop_length,
+                                 window=self.window, length=length)
+
+        # Batched irfft, then overlap-add the hop-sized blocks of every frame
+        n_frames = stft.shape[-1]
+        n_blocks = self.n_fft // self.hop_length
+        out = np.zeros(stft.shape[:-2] + (n_frames + n_blocks - 1, self.hop_length),
+                       dtype=stft.real.dtype)
+        self._overlap_add(stft, out, 0)
+        return self._finish_istft(out, length)
+
+    def apply_mask(self, audio, mask):
+        """
+        Split audio into the masked part and its remainder.
+
+        The STFT is recomputed block by block, so neither the full complex
+        STFT nor the two masked STFTs are ever held in memory.
+
+        Args:
+            audio: Audio signal
+            mask: Real mask for the first source, shape of the STFT
+
+        Returns:
+            masked: Audio under the mask
+            remainder: audio minus masked
         """
-        return librosa.stft(audio, n_fft=self.n_fft, hop_length=self.hop_length)
+        if self.n_fft % self.hop_length:
+            # librosa.istft fallback needs the whole STFT at once
+            stft = self.compute_stft(audio)
+            sources = np.empty((2,) + stft.shape, dtype=stft.dtype)
+            np.multiply(mask, stft, out=sources[0])
+            np.subtract(stft, sources[0], out=sources[1])
+            return self.compute_istft(sources, len(audio))
+
+        n_blocks = self.n_fft // self.hop_length
+        out = np.zeros((2, mask.shape[1] + n_blocks - 1, self.hop_length), dtype=np.float32)
+        for start, block in self._stft_blocks(audio):
+            # The mask is real, so scaling the complex STFT keeps the mixture
+            # phase; the second source is the remainder (mask 1 - mask)
+            sources = np.empty((2,) + block.shape, dtype=block.dtype)
+            np.multiply(mask[:, start:start + block.shape[1]], block, out=sources[0])
+            np.subtract(block, sources[0], out=sources[1])
+            self._overlap_add(sources, out, start)
+        return self._finish_istft(out, len(audio))
 
     def find_repeating_period(self, spectrogram, sr):
         """
@@ -68,14 +237,15 @@ class REPET:
         Returns:
             period: Repeating period in frames
         """
-        # Compute beat spectrum (autocorrelation along time axis)
-        beat_spectrum = np.mean([
-            np.correlate(spectrogram[i, :], spectrogram[i, :], mode='full')
-            for i in range(min(spectrogram.shape[0], 100))
-        ], axis=0)
-
-        # Take second half (positive lags)
-        beat_spectrum = beat_spectrum[len(beat_spectrum)//2:]
+        # Compute beat spectrum (autocorrelation along time axis) for the
+        # lowest 100 bins with one batched FFT; zero padding to 2T - 1 keeps
+        # it linear, and the first T lags are the non-negative ones
+        bins = spectrogram[:100].astype(np.float64)
+        num_frames = bins.shape[1]
+        n = next_fast_len(2 * num_frames - 1)
+        spec = rfft(bins, n=n, axis=1, workers=-1)
+        autocorr = irfft(spec.real ** 2 + spec.imag ** 2, n=n, axis=1, workers=-1)
+        beat_spectrum = autocorr[:, :num_frames].mean(axis=0)
 
         # Find peaks to determine period
         # Look for period between 1-10 seconds
@@ -90,6 +260,27 @@ class REPET:
 
         return max(period, 1)
 
+    def _running_median(self, spectrogram, size):
+        """
+        Centered running median along the time axis.
+
+        Args:
+            spectrogram: Magnitude spectrogram
+            size: Window length in frames
+
+        Returns:
+            Median-filtered spectrogram
+        """
+        if bottleneck is None:
+            return median_filter(spectrogram, size=(1, size))
+
+        # move_median is a trailing window; symmetric padding centres it and
+        # matches median_filter's default 'reflect' edges
+        left = size // 2
+        padded = np.pad(spectrogram, ((0, 0), (left, size - 1 - left)), mode='symmetric')
+        filtered = bottleneck.move_median(padded, window=size, axis=1)[:, size - 1:]
+        return filtered.astype(spectrogram.dtype, copy=False)
+
     def compute_repeating_mask(self, spectrogram, period):
         """
         Compute the repeating pattern mask.
@@ -106,39 +297,29 @@ class REPET:
 
         if num_repetitions < 2:
             # Not enough repetitions, return simple median filter
-            repeating_spec = median_filter(spectrogram, size=(1, period))
+            repeating_spec = self._running_median(spectrogram, period)
         else:
-            # Compute repeating segment by taking median over segments
-            segments = []
-            for i in range(num_repetitions):
-                start = i * period
-                end = min(start + period, num_frames)
-                if end - start == period:
-                    segments.append(spectrogram[:, start:end])
-
-            if segments:
-                # Stack and take median
-                segments_array = np.stack(segments, axis=0)
-                repeating_segment = np.median(segments_array, axis=0)
-
-                # Tile the repeating segment
-                repeating_spec = np.tile(repeating_segment, (1, num_repetitions))
-
-                # Trim or pad to match original length
-                if repeating_spec.shape[1] > num_frames:
-                    repeating_spec = repeating_spec[:, :num_frames]
-                elif repeating_spec.shape[1] < num_frames:
-                    pad_width = num_frames - repeating_spec.shape[1]
-                    repeating_spec = np.pad(repeating_spec,
-                                           ((0, 0), (0, pad_width)),
-                                           mode='edge')
-            else:
-                repeating_spec = spectrogram
-
-        # Create soft mask using Wiener-like filtering
+            # Compute repeating segment by taking median over the full
+            # periods, viewed as (bins, repetitions, period) without copying
+            num_bins = spectrogram.shape[0]
+            covered = num_repetitions * period
+            segments = spectrogram[:, :covered].reshape(num_bins, num_repetitions, period)
+            repeating_segment = np.median(segments, axis=1)
+
+            # Tile the repeating segment straight into the output, then
+            # extend the last column over any trailing partial period
+            repeating_spec = np.empty_like(spectrogram)
+            tiled = repeating_spec[:, :covered].reshape(num_bins, num_repetitions, period)
+            tiled[:] = repeating_segment[:, None, :]
+            repeating_spec[:, covered:] = repeating_segment[:, -1:]
+
+        # Create soft mask using Wiener-like filtering, reusing the
+        # repeating spectrogram's buffer so only spectrogram + eps is a temporary
         eps = 1e-10
-        mask = (repeating_spec + eps) / (spectrogram + eps)
-        mask = np.minimum(mask, 1.0)
+        mask = repeating_spec
+        mask += eps
+        np.divide(mask, spectrogram + eps, out=mask)
+        np.minimum(mask, 1.0, out=mask)
 
         return mask
 
@@ -160,9 +341,7 @@ class REPET:
         audio, sr = self.load_audio(filepath)
 
         print("Computing STFT...")
-        stft = self.compute_stft(audio)
-        magnitude = np.abs(stft)
-        phase = np.angle(stft)
+        magnitude = self.compute_magnitude(audio)
 
         print("Finding repeating period...")
         period = self.find_repeating_period(magnitude, sr)
@@ -170,28 +349,28 @@ class REPET:
 
         print("Computing repeating pattern mask...")
         instrumental_mask = self.compute_repeating_mask(magnitude, period)
-        vocal_mask = 1.0 - instrumental_mask
-
-        # Apply masks
-        instrumental_stft = instrumental_mask * magnitude * np.exp(1j * phase)
-        vocal_stft = vocal_mask * magnitude * np.exp(1j * phase)
+        del magnitude
 
         print("Reconstructing audio...")
-        instrumental = librosa.istft(instrumental_stft,
-                                     hop_length=self.hop_length,
-                                     length=len(audio))
-        vocal = librosa.istft(vocal_stft,
-                             hop_length=self.hop_length,
-                             length=len(audio))
-
-        # Save outputs if paths provided
+        # The vocal is the remainder under the instrumental mask
+        instrumental, vocal = self.apply_mask(audio, instrumental_mask)
+
+        # Save outputs if paths provided; the writes are independent and
+        # libsndfile runs without the GIL, so they overlap
+        writes = []
         if output_instrumental:
             print(f"Saving instrumental to: {output_instrumental}")
-            sf.write(output_instrumental, instrumental, sr)
+            writes.append((output_instrumental, instrumental))
 
         if output_vocal:
             print(f"Saving vocal to: {output_vocal}")
-            sf.write(output_vocal, vocal, sr)
+            writes.append((output_vocal, vocal))
+
+        if writes:
+            with ThreadPoolExecutor(max_workers=len(writes)) as pool:
+                futures = [pool.submit(sf.write, path, signal, sr) for path, signal in writes]
+                for future in futures:
+                    future.result()
 
         print("Separation complete!")
         return vocal, instrumental, sr
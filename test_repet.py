@@ -3,10 +3,17 @@ Test script for REPET algorithm
 Creates a synthetic audio signal and tests the separation
 """
 
+import logging
 import numpy as np
+import librosa
 import soundfile as sf
 from repet import REPET
+import pitch_shift
+from pitch_shift import PitchShifter
 import os
+import tempfile
+
+log = logging.getLogger(__name__)
 
 
 def create_test_audio(duration=10, sr=22050):
@@ -26,34 +33,56 @@ def create_test_audio(duration=10, sr=22050):
     """
     print("Creating synthetic test audio...")
 
-    t = np.linspace(0, duration, int(sr * duration))
+    # Sample times n / sr, so every pattern period ends exactly one sample
+    # before the next begins; float32 throughout, as Python-float
+    # constants don't upcast float32 arrays
+    t = np.arange(int(sr * duration), dtype=np.float32) / sr
 
     # Create repeating instrumental pattern (2 seconds period)
     period = 2.0  # seconds
     pattern_length = int(sr * period)
 
-    # Generate one period of instrumental (mix of sine waves)
-    t_pattern = np.linspace(0, period, pattern_length)
-    instrumental_pattern = (
-        0.3 * np.sin(2 * np.pi * 220 * t_pattern) +  # A3
-        0.2 * np.sin(2 * np.pi * 440 * t_pattern) +  # A4
-        0.15 * np.sin(2 * np.pi * 330 * t_pattern)   # E4
-    )
-
-    # Repeat the pattern
-    num_repeats = int(np.ceil(duration / period))
-    instrumental = np.tile(instrumental_pattern, num_repeats)[:len(t)]
-
-    # Create non-repeating vocal-like signal (varying frequency)
-    vocal = 0.2 * np.sin(2 * np.pi * (523 + 50 * np.sin(2 * np.pi * 0.5 * t)) * t)
+    # Generate one period of instrumental (mix of sine waves), accumulated
+    # in place into one buffer
+    t_pattern = np.arange(pattern_length, dtype=np.float32) / sr
+    instrumental_pattern = np.zeros(pattern_length, dtype=np.float32)
+    partial = np.empty_like(instrumental_pattern)
+    for amplitude, freq in ((0.3, 220),    # A3
+                            (0.2, 440),    # A4
+                            (0.15, 330)):  # E4
+        np.sin(2 * np.pi * freq * t_pattern, out=partial)
+        partial *= amplitude
+        instrumental_pattern += partial
+
+    # Repeat the pattern straight into an exactly sized buffer: whole
+    # periods through a (repeats, period) view, then the partial tail
+    instrumental = np.empty(len(t), dtype=np.float32)
+    num_repeats = len(t) // pattern_length
+    covered = num_repeats * pattern_length
+    instrumental[:covered].reshape(num_repeats, pattern_length)[:] = instrumental_pattern
+    instrumental[covered:] = instrumental_pattern[:len(t) - covered]
+
+    # Create non-repeating vocal-like signal: 523 Hz with +/-50 Hz vibrato
+    # at 0.3 Hz (so it doesn't repeat with the 2 s pattern), synthesized
+    # from its integrated phase 2*pi*fc*t - (df/fm)*cos(2*pi*fm*t)
+    vocal = np.empty(len(t), dtype=np.float32)
+    np.cos(2 * np.pi * 0.3 * t, out=vocal)
+    vocal *= -(50 / 0.3)
+    vocal += 2 * np.pi * 523 * t
+    np.sin(vocal, out=vocal)
+    vocal *= 0.2
 
     # Mix them together
     mixed = instrumental + vocal
 
-    # Normalize
-    mixed = mixed / np.max(np.abs(mixed)) * 0.9
-    instrumental = instrumental / np.max(np.abs(instrumental)) * 0.9
-    vocal = vocal / np.max(np.abs(vocal)) * 0.9
+    # Normalize each signal in place. Only the mix needs a full peak scan:
+    # the instrumental's samples all come from (the start of) one pattern
+    # period, and the vocal is a 0.2-amplitude sine
+    pattern = instrumental_pattern[:len(t)]
+    instrumental_peak = max(pattern.max(), -pattern.min())
+    mixed *= 0.9 / max(mixed.max(), -mixed.min())
+    instrumental *= 0.9 / instrumental_peak
+    vocal *= 0.9 / 0.2
 
     return mixed, instrumental, vocal, sr
 
@@ -69,7 +98,7 @@ def test_repet_basic():
 
     # Save test input
     test_input = "test_input.wav"
-    sf.write(test_input, mixed, sr)
+    sf.write(test_input, mixed, sr, subtype='PCM_16')
     print(f"✓ Created test input: {test_input}")
 
     # Run REPET
@@ -88,13 +117,14 @@ def test_repet_basic():
         print(f"  - Output vocal: test_vocal.wav")
         print(f"  - Output instrumental: test_instrumental.wav")
 
-        # Check output files exist
-        if os.path.exists("test_vocal.wav"):
+        # Check output files exist (one directory scan for both)
+        present = {entry.name for entry in os.scandir(".")}
+        if "test_vocal.wav" in present:
             print("✓ Vocal file created")
         else:
             print("✗ Vocal file not found")
 
-        if os.path.exists("test_instrumental.wav"):
+        if "test_instrumental.wav" in present:
             print("✓ Instrumental file created")
         else:
             print("✗ Instrumental file not found")
@@ -131,8 +161,7 @@ def test_repet_basic():
 
     except Exception as e:
         print(f"\n✗ Error during separation: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Separation failed")
         return False
 
 
@@ -169,6 +198,120 @@ def test_file_formats():
     return True
 
 
+def test_stft_roundtrip():
+    """Test REPET's STFT/iSTFT against librosa."""
+    print("\n" + "="*60)
+    print("TEST 4: STFT Round-Trip vs librosa")
+    print("="*60)
+
+    sr = 22050
+    audio = (0.1 * np.random.default_rng(0).standard_normal(3 * sr)).astype(np.float32)
+    ok = True
+
+    # 512 divides n_fft (block overlap-add path); 300 falls back to librosa.istft
+    for n_fft, hop_length in ((2048, 512), (2048, 300)):
+        repet = REPET(n_fft=n_fft, hop_length=hop_length)
+        stft = repet.compute_stft(audio)
+        reference = librosa.stft(audio, n_fft=n_fft, hop_length=hop_length, window='hann')
+        expected = librosa.istft(reference, hop_length=hop_length, window='hann',
+                                 length=len(audio))
+
+        checks = [
+            ("STFT matches librosa.stft",
+             stft.shape == reference.shape and np.allclose(stft, reference, atol=1e-4)),
+            ("iSTFT matches librosa.istft(librosa.stft(...))",
+             np.allclose(repet.compute_istft(stft, len(audio)), expected, atol=1e-5)),
+        ]
+
+        # Blocked separation path: an all-ones mask keeps everything
+        kept, rest = repet.apply_mask(audio, np.ones(stft.shape, dtype=np.float32))
+        checks.append(("Blocked apply_mask reconstructs the input",
+                       np.allclose(kept, expected, atol=1e-5) and np.abs(rest).max() < 1e-5))
+
+        print(f"  n_fft={n_fft}, hop_length={hop_length}:")
+        for name, passed in checks:
+            print(f"  {'✓' if passed else '✗'} {name}")
+            ok = ok and passed
+
+    assert ok, "REPET STFT/iSTFT disagrees with librosa"
+    return True
+
+
+def test_pitch_shift_outputs():
+    """Test pitch shifter output shape/dtype and pitch detection."""
+    print("\n" + "="*60)
+    print("TEST 5: Pitch Shifter Outputs")
+    print("="*60)
+
+    # 2 s harmonic tone at 220 Hz
+    sr = 22050
+    t = np.arange(2 * sr, dtype=np.float32) / sr
+    tone = np.zeros_like(t)
+    for harmonic, amplitude in ((1, 0.5), (2, 0.25), (3, 0.12)):
+        tone += amplitude * np.sin(2 * np.pi * 220 * harmonic * t)
+
+    shifter = PitchShifter(sr=sr)
+    factor = 2 ** (3 / 12)
+    ok = True
+
+    for name, method in (("td_psola", shifter.td_psola),
+                         ("wsola", shifter.wsola),
+                         ("phase_vocoder_inplace", shifter.phase_vocoder_inplace)):
+        shifted = method(tone, factor)
+        passed = (len(shifted) == len(tone) and shifted.dtype == np.float32
+                  and np.isfinite(shifted).all())
+        print(f"  {'✓' if passed else '✗'} {name}: {len(shifted)} samples, {shifted.dtype}")
+        ok = ok and passed
+
+    # Pitch marks walk one period (sr / 220 samples) at a time
+    spacing = np.median(np.diff(shifter.find_pitch_marks_yin(tone, fmin=80, fmax=500)))
+    passed = abs(spacing - sr / 220) <= 2
+    print(f"  {'✓' if passed else '✗'} Pitch mark spacing: {spacing:.0f} samples")
+    ok = ok and passed
+
+    # Median pitch through the YIN path (the one used without pyworld)
+    saved, pitch_shift.pyworld = pitch_shift.pyworld, None
+    try:
+        detected = shifter.detect_pitch_from_audio(tone)
+        vocoded = shifter.detect_pitch_from_audio(shifter.phase_vocoder_inplace(tone, factor))
+    finally:
+        pitch_shift.pyworld = saved
+    for label, pitch, target in (("Tone", detected, 220.0),
+                                 ("Phase-vocoded tone", vocoded, 220.0 * factor)):
+        passed = abs(pitch / target - 1) < 0.02
+        print(f"  {'✓' if passed else '✗'} {label} pitch: {pitch:.1f} Hz (expected {target:.1f} Hz)")
+        ok = ok and passed
+
+    assert ok, "pitch shifter output check failed"
+    return True
+
+
+def test_wav_duration():
+    """Test the GUI's RIFF header duration probe against soundfile."""
+    print("\n" + "="*60)
+    print("TEST 6: WAV Header Duration")
+    print("="*60)
+
+    # Imported here: the player pulls in tkinter and pygame
+    from audio_player import _wav_duration
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "duration.wav")
+        for subtype in ("PCM_16", "PCM_24", "FLOAT"):
+            for channels in (1, 2):
+                sf.write(path, np.zeros((12345, channels), dtype=np.float32), 16000,
+                         subtype=subtype)
+                duration, expected = _wav_duration(path), sf.info(path).duration
+                passed = duration is not None and abs(duration - expected) < 1e-9
+                print(f"  {'✓' if passed else '✗'} {subtype}, {channels} ch: "
+                      f"{duration} s (soundfile: {expected} s)")
+                ok = ok and passed
+
+    assert ok, "_wav_duration disagrees with soundfile"
+    return True
+
+
 def main():
     """Run all tests."""
     print("\n" + "="*60)
@@ -201,6 +344,16 @@ def main():
         print(f"Test failed with error: {e}")
         results.append(("Format Support Test", False))
 
+    # Tests 4-6: DSP building blocks
+    for test_name, test in (("STFT Round-Trip Test", test_stft_roundtrip),
+                            ("Pitch Shifter Output Test", test_pitch_shift_outputs),
+                            ("WAV Duration Test", test_wav_duration)):
+        try:
+            results.append((test_name, test()))
+        except Exception as e:
+            print(f"Test failed with error: {e}")
+            results.append((test_name, False))
+
     # Summary
     print("\n" + "="*60)
     print("TEST SUMMARY")